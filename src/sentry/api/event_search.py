@@ -1,12 +1,13 @@
 from __future__ import absolute_import
 
 import re
+from bisect import bisect_left
 from collections import namedtuple, defaultdict
-from copy import deepcopy
 from datetime import datetime
 
 import six
 from django.utils.functional import cached_property
+from functools32 import lru_cache
 from parsimonious.expressions import Optional
 from parsimonious.exceptions import IncompleteParseError, ParseError
 from parsimonious.nodes import Node
@@ -21,18 +22,20 @@ from sentry.search.utils import (
     InvalidQuery,
 )
 from sentry.utils.dates import to_timestamp
-from sentry.utils.snuba import SENTRY_SNUBA_MAP, get_snuba_column_name
-
-WILDCARD_CHARS = re.compile(r"[\*]")
+from sentry.utils.snuba import NO_CONVERSION_COLUMNS, SENTRY_SNUBA_MAP, get_snuba_column_name
 
 
+@lru_cache(maxsize=1000)
 def translate(pat):
     """Translate a shell PATTERN to a regular expression.
     modified from: https://github.com/python/cpython/blob/2.7/Lib/fnmatch.py#L85
     """
 
     i, n = 0, len(pat)
-    res = ""
+    # Collect runs of literal characters and escape each run in one go, rather
+    # than growing the result string one escaped character at a time.
+    res = []
+    literal = []
     while i < n:
         c = pat[i]
         i = i + 1
@@ -40,10 +43,13 @@ def translate(pat):
         # Applied this basic patch to handle it:
         # https://bugs.python.org/file27570/issue8402.1.patch
         if c == "\\":
-            res += re.escape(pat[i])
+            literal.append(pat[i])
             i += 1
         elif c == "*":
-            res = res + ".*"
+            if literal:
+                res.append(re.escape("".join(literal)))
+                literal = []
+            res.append(".*")
         # TODO: We're disabling everything except for wildcard matching for the
         # moment. Just commenting this code out for the moment, since there's a
         # reasonable chance we'll add this back in in the future.
@@ -68,8 +74,10 @@ def translate(pat):
         #             stuff = '\\' + stuff
         #         res = '%s[%s]' % (res, stuff)
         else:
-            res = res + re.escape(c)
-    return "^" + res + "$"
+            literal.append(c)
+    if literal:
+        res.append(re.escape("".join(literal)))
+    return "^" + "".join(res) + "$"
 
 
 # Explaination of quoted string regex, courtesy of Matt
@@ -152,7 +160,6 @@ SEARCH_MAP = dict(
     },
     **SENTRY_SNUBA_MAP
 )
-no_conversion = set(["project_id", "start", "end"])
 
 PROJECT_KEY = "project.name"
 
@@ -168,7 +175,7 @@ class SearchBoolean(namedtuple("SearchBoolean", "left_term operator right_term")
 
 class SearchFilter(namedtuple("SearchFilter", "key operator value")):
     def __str__(self):
-        return "".join(map(six.text_type, (self.key.name, self.operator, self.value.raw_value)))
+        return u"%s%s%s" % (self.key.name, self.operator, self.value.raw_value)
 
     @cached_property
     def is_negation(self):
@@ -184,7 +191,7 @@ class SearchFilter(namedtuple("SearchFilter", "key operator value")):
 
 
 class SearchKey(namedtuple("SearchKey", "name")):
-    @property
+    @cached_property
     def snuba_name(self):
         snuba_name = SEARCH_MAP.get(self.name)
         if snuba_name:
@@ -207,14 +214,14 @@ class SearchValue(namedtuple("SearchValue", "raw_value")):
     def is_wildcard(self):
         if not isinstance(self.raw_value, six.string_types):
             return False
-        return bool(WILDCARD_CHARS.search(self.raw_value))
+        return "*" in self.raw_value
 
 
 class SearchVisitor(NodeVisitor):
     # A list of mappers that map source keys to a target name. Format is
     # <target_name>: [<list of source names>],
     key_mappings = {}
-    numeric_keys = set(
+    numeric_keys = frozenset(
         [
             "device.battery_level",
             "device.charging",
@@ -230,7 +237,7 @@ class SearchVisitor(NodeVisitor):
             # so they can be used in conditions
         ]
     )
-    date_keys = set(["start", "end", "first_seen", "last_seen", "time", "timestamp"])
+    date_keys = frozenset(["start", "end", "first_seen", "last_seen", "time", "timestamp"])
 
     unwrapped_exceptions = (InvalidSearchQuery,)
 
@@ -243,35 +250,32 @@ class SearchVisitor(NodeVisitor):
         return lookup
 
     def flatten(self, children):
-        def _flatten(seq):
-            # there is a list from search_term and one from raw_search, so flatten them.
-            # Flatten each group in the list, since nodes can return multiple items
-            for item in seq:
-                if isinstance(item, list):
-                    for sub in _flatten(item):
-                        yield sub
-                else:
-                    yield item
-
         if not (children and isinstance(children, list) and isinstance(children[0], list)):
             return children
 
-        children = [child for group in children for child in _flatten(group)]
-        children = filter(None, _flatten(children))
-
-        return children
-
-    def remove_optional_nodes(self, children):
-        def is_not_optional(child):
-            return not (isinstance(child, Node) and isinstance(child.expr, Optional))
-
-        return filter(is_not_optional, children)
+        # there is a list from search_term and one from raw_search, so flatten them.
+        # Flatten each group in the list, since nodes can return multiple items
+        flattened = []
+        for group in children:
+            stack = list(group)
+            stack.reverse()
+            while stack:
+                item = stack.pop()
+                if isinstance(item, list):
+                    stack.extend(reversed(item))
+                elif item:
+                    flattened.append(item)
 
-    def remove_space(self, children):
-        def is_not_space(child):
-            return not (isinstance(child, Node) and child.text == " ")
+        return flattened
 
-        return filter(is_not_space, children)
+    def remove_optional_nodes_and_space(self, children):
+        return [
+            child
+            for child in children
+            if not (
+                isinstance(child, Node) and (isinstance(child.expr, Optional) or child.text == " ")
+            )
+        ]
 
     def visit_search(self, node, children):
         return self.flatten(children)
@@ -296,14 +300,15 @@ class SearchVisitor(NodeVisitor):
         return SearchFilter(SearchKey("message"), "=", SearchValue(value))
 
     def visit_boolean_term(self, node, children):
-        def find_next_operator(children, start, end, operator):
-            for index in range(start, end):
-                if children[index] == operator:
-                    return index
+        def find_next_operator(operator_indexes, start, end):
+            # operator_indexes is sorted, so find the first one within [start, end)
+            position = bisect_left(operator_indexes, start)
+            if position < len(operator_indexes) and operator_indexes[position] < end:
+                return operator_indexes[position]
             return None
 
-        def build_boolean_tree_branch(children, start, end, operator):
-            index = find_next_operator(children, start, end, operator)
+        def build_boolean_tree_branch(children, start, end, operator_indexes):
+            index = find_next_operator(operator_indexes, start, end)
             if index is None:
                 return None
             left = build_boolean_tree(children, start, index)
@@ -314,22 +319,28 @@ class SearchVisitor(NodeVisitor):
             if end - start == 1:
                 return children[start]
 
-            result = build_boolean_tree_branch(children, start, end, SearchBoolean.BOOLEAN_OR)
+            result = build_boolean_tree_branch(children, start, end, or_indexes)
             if result is None:
-                result = build_boolean_tree_branch(children, start, end, SearchBoolean.BOOLEAN_AND)
+                result = build_boolean_tree_branch(children, start, end, and_indexes)
 
             return result
 
         children = self.flatten(children)
-        children = self.remove_optional_nodes(children)
-        children = self.remove_space(children)
+        children = self.remove_optional_nodes_and_space(children)
+
+        or_indexes = []
+        and_indexes = []
+        for index, child in enumerate(children):
+            if child == SearchBoolean.BOOLEAN_OR:
+                or_indexes.append(index)
+            elif child == SearchBoolean.BOOLEAN_AND:
+                and_indexes.append(index)
 
         return [build_boolean_tree(children, 0, len(children))]
 
     def visit_paren_term(self, node, children):
         children = self.flatten(children)
-        children = self.remove_optional_nodes(children)
-        children = self.remove_space(children)
+        children = self.remove_optional_nodes_and_space(children)
 
         return self.flatten(children[1])
 
@@ -480,9 +491,43 @@ class SearchVisitor(NodeVisitor):
         return children or node
 
 
+# Parse trees grow with the query, so only reasonably short queries are cached.
+MAX_CACHED_QUERY_LENGTH = 256
+
+
+@lru_cache(maxsize=512)
+def _parse_cached_search_tree(query):
+    return event_search_grammar.parse(query)
+
+
+def parse_search_tree(query):
+    """
+    Parses a search query into a parse tree. Only the tree is cached: visiting
+    it resolves relative dates against the current time, so the visited terms
+    must be rebuilt on every call.
+    """
+    if len(query) > MAX_CACHED_QUERY_LENGTH:
+        return event_search_grammar.parse(query)
+    return _parse_cached_search_tree(query)
+
+
+search_visitor = SearchVisitor()
+
+# Characters that can turn a query into anything other than a raw text search in
+# the grammar above: key/value separators, comparison operators, quotes, parens
+# and the characters `raw_search` refuses to match.
+NON_RAW_SEARCH_CHARS = re.compile(r"[:<>=\"()^\n]")
+
+
 def parse_search_query(query):
+    # Plain free text always parses to a single message filter, so skip the
+    # grammar entirely for it.
+    value = query.strip(" ")
+    if value and not NON_RAW_SEARCH_CHARS.search(value):
+        return [SearchFilter(SearchKey("message"), "=", SearchValue(value))]
+
     try:
-        tree = event_search_grammar.parse(query)
+        tree = parse_search_tree(query)
     except IncompleteParseError as e:
         raise InvalidSearchQuery(
             "%s %s"
@@ -491,7 +536,7 @@ def parse_search_query(query):
                 "This is commonly caused by unmatched-parentheses. Enclose any text in double quotes.",
             )
         )
-    return SearchVisitor().visit(tree)
+    return search_visitor.visit(tree)
 
 
 def convert_search_boolean_to_snuba_query(search_boolean):
@@ -524,9 +569,16 @@ def convert_search_filter_to_snuba_query(search_filter):
     snuba_name = search_filter.key.snuba_name
     value = search_filter.value.value
 
-    if snuba_name in no_conversion:
+    if snuba_name in NO_CONVERSION_COLUMNS:
         return
     elif snuba_name == "environment":
+        # A single environment needs neither deduplication nor splitting
+        if isinstance(value, six.string_types):
+            if value == "":
+                operator = "IS NULL" if search_filter.operator == "=" else "IS NOT NULL"
+                return [["environment", operator, None]]
+            return [["environment", "IN", [value]]]
+
         env_conditions = []
         _envs = set(value if isinstance(value, (list, tuple)) else [value])
         # the "no environment" environment is null in snuba
@@ -545,7 +597,7 @@ def convert_search_filter_to_snuba_query(search_filter):
             # XXX: We don't want the '^$' values at the beginning and end of
             # the regex since we want to find the pattern anywhere in the
             # message. Strip off here
-            value = search_filter.value.value[1:-1]
+            value = value[1:-1]
             return [["match", ["message", "'(?i)%s'" % (value,)]], search_filter.operator, 1]
         else:
             # https://clickhouse.yandex/docs/en/query_language/functions/string_search_functions/#position-haystack-needle
@@ -569,7 +621,7 @@ def convert_search_filter_to_snuba_query(search_filter):
             snuba_name = ["ifNull", [snuba_name, "''"]]
 
         # Handle checks for existence
-        if search_filter.operator in ("=", "!=") and search_filter.value.value == "":
+        if search_filter.operator in ("=", "!=") and value == "":
             if search_filter.key.is_tag:
                 return [snuba_name, search_filter.operator, value]
             else:
@@ -614,24 +666,26 @@ def get_snuba_query_args(query=None, params=None):
     if params is not None:
         parsed_terms.extend(convert_endpoint_params(params))
 
-    kwargs = {"conditions": [], "filter_keys": defaultdict(list)}
+    conditions = []
+    filter_keys = defaultdict(list)
+    kwargs = {"conditions": conditions, "filter_keys": filter_keys}
 
-    projects = {}
-    has_project_term = any(
-        isinstance(term, SearchFilter) and term.key.name == PROJECT_KEY for term in parsed_terms
-    )
-    if has_project_term:
-        projects = {
-            p["slug"]: p["id"]
-            for p in Project.objects.filter(id__in=params["project_id"]).values("id", "slug")
-        }
+    # Only look up project slugs once a project term is actually encountered
+    projects = None
 
     for term in parsed_terms:
         if isinstance(term, SearchFilter):
             snuba_name = term.key.snuba_name
             if term.key.name == PROJECT_KEY:
+                if projects is None:
+                    projects = {
+                        p["slug"]: p["id"]
+                        for p in Project.objects.filter(id__in=params["project_id"]).values(
+                            "id", "slug"
+                        )
+                    }
                 condition = ["project_id", "=", projects.get(term.value.value)]
-                kwargs["conditions"].append(condition)
+                conditions.append(condition)
 
             elif snuba_name in ("start", "end"):
                 kwargs[snuba_name] = term.value.value
@@ -639,14 +693,14 @@ def get_snuba_query_args(query=None, params=None):
                 value = term.value.value
                 if isinstance(value, int):
                     value = [value]
-                kwargs["filter_keys"][snuba_name].extend(value)
+                filter_keys[snuba_name].extend(value)
             else:
                 converted_filter = convert_search_filter_to_snuba_query(term)
-                kwargs["conditions"].append(converted_filter)
+                conditions.append(converted_filter)
         else:  # SearchBoolean
             # TODO(lb): remove when boolean terms fully functional
             kwargs["has_boolean_terms"] = True
-            kwargs["conditions"].append(convert_search_boolean_to_snuba_query(term))
+            conditions.append(convert_search_boolean_to_snuba_query(term))
     return kwargs
 
 
@@ -669,6 +723,14 @@ VALID_AGGREGATES = {
     "p75": {"snuba_name": "quantileTiming(0.75)", "fields": ["duration"]},
 }
 
+
+def copy_aggregations(aggregations):
+    # Aggregations are only ever nested one list deep (e.g. argMax's
+    # [column, column] argument), so an explicit two level copy is enough to
+    # keep the FIELD_ALIASES templates safe from in-place column translation.
+    return [[list(arg) if isinstance(arg, list) else arg for arg in agg] for agg in aggregations]
+
+
 AGGREGATE_PATTERN = re.compile(r"^(?P<function>[^\(]+)\((?P<column>[a-z\._]*)\)$")
 
 
@@ -691,18 +753,19 @@ def resolve_orderby(orderby, fields, aggregations):
     values. Aggregates and field aliases need to be resolve/validated.
     """
     orderby = orderby if isinstance(orderby, (list, tuple)) else [orderby]
+    field_names = set(fields)
+    aggregate_aliases = set(agg[2] for agg in aggregations)
     validated = []
     for column in orderby:
         bare_column = column.lstrip("-")
-        if bare_column in fields:
+        if bare_column in field_names:
             validated.append(column)
             continue
 
-        match = AGGREGATE_PATTERN.search(bare_column)
+        match = AGGREGATE_PATTERN.search(bare_column) if "(" in bare_column else None
         if match:
             bare_column = get_aggregate_alias(match)
-        found = [agg[2] for agg in aggregations if agg[2] == bare_column]
-        if found:
+        if bare_column in aggregate_aliases:
             prefix = "-" if column.startswith("-") else ""
             validated.append(prefix + bare_column)
 
@@ -740,14 +803,15 @@ def resolve_field_list(fields, snuba_args):
             raise InvalidSearchQuery("Field names must be strings")
 
         if field in FIELD_ALIASES:
-            special_field = deepcopy(FIELD_ALIASES[field])
+            special_field = FIELD_ALIASES[field]
             columns.extend(special_field.get("fields", []))
-            aggregations.extend(special_field.get("aggregations", []))
+            aggregations.extend(copy_aggregations(special_field.get("aggregations", [])))
             continue
 
         # Basic fields don't require additional validation. They could be tag
-        # names which we have no way of validating at this point.
-        match = AGGREGATE_PATTERN.search(field)
+        # names which we have no way of validating at this point. Only run the
+        # aggregate pattern on fields that could possibly be function calls.
+        match = AGGREGATE_PATTERN.search(field) if "(" in field else None
         if not match:
             columns.append(field)
             continue
@@ -773,7 +837,7 @@ def resolve_field_list(fields, snuba_args):
             columns.append("id")
             columns.append("project.id")
         if aggregations and "latest_event" not in fields:
-            aggregations.extend(deepcopy(FIELD_ALIASES["latest_event"]["aggregations"]))
+            aggregations.extend(copy_aggregations(FIELD_ALIASES["latest_event"]["aggregations"]))
         if aggregations and "project.id" not in columns:
             aggregations.append(["argMax", ["project_id", "timestamp"], "projectid"])
 
@@ -826,11 +890,15 @@ def get_reference_event_conditions(snuba_args, event_slug):
     This is a key part of pagination in the event details modal and
     summary graph navigation.
     """
-    field_names = [get_snuba_column_name(field) for field in snuba_args.get("groupby", [])]
+    # Resolve each groupby field and its tag key (if any) once up front.
+    fields = []
     # translate the field names into enum columns
     columns = []
     has_tags = False
-    for field in field_names:
+    for field in snuba_args.get("groupby", []):
+        field = get_snuba_column_name(field)
+        match = TAG_KEY_RE.match(field)
+        fields.append((field, match.group(1) if match else None))
         if field.startswith("tags["):
             has_tags = True
         else:
@@ -845,19 +913,21 @@ def get_reference_event_conditions(snuba_args, event_slug):
 
     conditions = []
     tags = {}
-    if "tags.key" in event_data and "tags.value" in event_data:
+    if has_tags and "tags.key" in event_data and "tags.value" in event_data:
         tags = dict(zip(event_data["tags.key"], event_data["tags.value"]))
 
-    for field in field_names:
-        match = TAG_KEY_RE.match(field)
-        if match:
-            value = tags.get(match.group(1), None)
+    for field, tag_key in fields:
+        if tag_key is not None:
+            value = tags.get(tag_key, None)
         else:
             value = event_data.get(field, None)
-            # If the value is a sequence use the first element as snuba
-            # doesn't support `=` or `IN` operations on fields like exception_frames.filename
-            if isinstance(value, (list, set)) and value:
-                value = value.pop()
+            # If the value is a sequence use a single element as snuba
+            # doesn't support `=` or `IN` operations on fields like exception_frames.filename.
+            # Read it without popping so the reference event data isn't mutated.
+            if isinstance(value, list) and value:
+                value = value[-1]
+            elif isinstance(value, set) and value:
+                value = next(iter(value))
         if value:
             conditions.append([field, "=", value])
 
@@ -4,12 +4,12 @@ from django.utils.functional import cached_property
 from parsimonious.exceptions import IncompleteParseError
 
 from sentry.api.event_search import (
-    event_search_grammar,
     InvalidSearchQuery,
     SearchFilter,
     SearchKey,
     SearchValue,
     SearchVisitor,
+    parse_search_tree,
 )
 from sentry.constants import STATUS_CHOICES
 from sentry.search.utils import (
@@ -71,9 +71,12 @@ class IssueSearchVisitor(SearchVisitor):
         )
 
 
+issue_search_visitor = IssueSearchVisitor()
+
+
 def parse_search_query(query):
     try:
-        tree = event_search_grammar.parse(query)
+        tree = parse_search_tree(query)
     except IncompleteParseError as e:
         raise InvalidSearchQuery(
             "%s %s"
@@ -82,7 +85,7 @@ def parse_search_query(query):
                 "This is commonly caused by unmatched-parentheses. Enclose any text in double quotes.",
             )
         )
-    return IssueSearchVisitor().visit(tree)
+    return issue_search_visitor.visit(tree)
 
 
 def convert_actor_value(value, projects, user, environments):
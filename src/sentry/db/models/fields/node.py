@@ -58,8 +58,13 @@ class NodeData(collections.MutableMapping):
         # collection types.  For isntance we have events where this is a
         # CanonicalKeyDict
         data.pop("data", None)
-        data["_node_data_CANONICAL"] = isinstance(data["_node_data"], CANONICAL_TYPES)
-        data["_node_data"] = dict(data["_node_data"].items())
+        node_data = data["_node_data"]
+        data["_node_data_CANONICAL"] = isinstance(node_data, CANONICAL_TYPES)
+        if isinstance(node_data, CanonicalKeyDict):
+            # The wrapped dict already holds the normalized keys.
+            data["_node_data"] = dict(node_data.data)
+        else:
+            data["_node_data"] = dict(node_data)
         return data
 
     def __setstate__(self, state):
@@ -153,7 +158,11 @@ class NodeData(collections.MutableMapping):
         # We can't put our wrappers into the nodestore, so we need to
         # ensure that the data is converted into a plain old dict
         to_write = self._node_data
-        if isinstance(to_write, CANONICAL_TYPES):
+        if isinstance(to_write, CanonicalKeyDict):
+            # The wrapped dict already holds the normalized keys and is only
+            # serialized by nodestore, so it can be written without a copy.
+            to_write = to_write.data
+        elif isinstance(to_write, CANONICAL_TYPES):
             to_write = dict(to_write.items())
 
         nodestore.set(self.id, to_write)
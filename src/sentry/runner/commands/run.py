@@ -31,6 +31,10 @@ class AddressParamType(click.ParamType):
 Address = AddressParamType()
 
 
+# The `events` queue has been split up into these queues.
+EVENTS_QUEUES = ("events.preprocess_event", "events.process_event", "events.save_event")
+
+
 class QueueSetType(click.ParamType):
     name = "text"
 
@@ -40,27 +44,17 @@ class QueueSetType(click.ParamType):
         # Providing a compatibility with splitting
         # the `events` queue until multiple queues
         # without the need to explicitly add them.
-        queues = set()
-        for queue in value.split(","):
-            if queue == "events":
-                queues.add("events.preprocess_event")
-                queues.add("events.process_event")
-                queues.add("events.save_event")
-
-                from sentry.runner.initializer import show_big_error
-
-                show_big_error(
-                    [
-                        "DEPRECATED",
-                        "`events` queue no longer exists.",
-                        "Switch to using:",
-                        "- events.preprocess_event",
-                        "- events.process_event",
-                        "- events.save_event",
-                    ]
-                )
-            else:
-                queues.add(queue)
+        queues = set(value.split(","))
+        if "events" in queues:
+            queues.remove("events")
+            queues.update(EVENTS_QUEUES)
+
+            from sentry.runner.initializer import show_big_error
+
+            show_big_error(
+                ["DEPRECATED", "`events` queue no longer exists.", "Switch to using:"]
+                + ["- %s" % queue for queue in EVENTS_QUEUES]
+            )
         return frozenset(queues)
 
 
@@ -15,21 +15,63 @@ class Encoder(object):
         self.types = types if types is not None else {}
 
     def dumps(self, value):
-        for cls, function in self.types.items():
+        for cls, function in six.iteritems(self.types):
             if isinstance(value, cls):
                 value = function(value)
 
+        # Nearly all values are builtins, so look up their exact type before
+        # falling back to the (comparatively slow) abstract base class checks.
+        encode = self.builtin_encoders.get(type(value))
+        if encode is not None:
+            return encode(self, value)
+
         if isinstance(value, six.binary_type):
-            return value
+            return self._dumps_binary(value)
         elif isinstance(value, six.text_type):
-            return value.encode("utf8")
+            return self._dumps_text(value)
         elif isinstance(value, self.number_types):
-            return six.text_type(value).encode("utf8")
+            return self._dumps_number(value)
         elif isinstance(value, Set):
-            return "\x00".join(sorted(map(self.dumps, value)))
+            return self._dumps_set(value)
         elif isinstance(value, Sequence):
-            return "\x01".join(map(self.dumps, value))
+            return self._dumps_sequence(value)
         elif isinstance(value, Mapping):
-            return "\x02".join(sorted("\x01".join(map(self.dumps, item)) for item in value.items()))
+            return self._dumps_mapping(value)
         else:
             raise TypeError(u"Unsupported type: {}".format(type(value)))
+
+    def _dumps_binary(self, value):
+        return value
+
+    def _dumps_text(self, value):
+        return value.encode("utf8")
+
+    def _dumps_number(self, value):
+        return six.text_type(value).encode("utf8")
+
+    def _dumps_integer(self, value):
+        # Equivalent to _dumps_number, without the intermediate text object.
+        return b"%d" % (value,)
+
+    def _dumps_set(self, value):
+        return "\x00".join(sorted(map(self.dumps, value)))
+
+    def _dumps_sequence(self, value):
+        return "\x01".join(map(self.dumps, value))
+
+    def _dumps_mapping(self, value):
+        return "\x02".join(sorted("\x01".join(map(self.dumps, item)) for item in value.items()))
+
+    builtin_encoders = dict.fromkeys(number_types, _dumps_number)
+    builtin_encoders.update(dict.fromkeys(six.integer_types, _dumps_integer))
+    builtin_encoders.update(
+        {
+            six.binary_type: _dumps_binary,
+            six.text_type: _dumps_text,
+            frozenset: _dumps_set,
+            set: _dumps_set,
+            list: _dumps_sequence,
+            tuple: _dumps_sequence,
+            dict: _dumps_mapping,
+        }
+    )
@@ -9,9 +9,8 @@ class MinHashSignatureBuilder(object):
         self.rows = rows
 
     def __call__(self, features):
-        return map(
-            lambda column: min(
-                map(lambda feature: mmh3.hash(feature, column) % self.rows, features)
-            ),
-            range(self.columns),
-        )
+        rows = self.rows
+        return [
+            min(mmh3.hash(feature, column) % rows for feature in features)
+            for column in range(self.columns)
+        ]
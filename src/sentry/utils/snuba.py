@@ -35,6 +35,7 @@ MAX_HASHES = 5000
 
 SAFE_FUNCTION_RE = re.compile(r"-?[a-zA-Z_][a-zA-Z0-9_]*$")
 QUOTED_LITERAL_RE = re.compile(r"^'.*'$")
+NO_CONVERSION_COLUMNS = frozenset(["project_id", "start", "end"])
 
 TRANSACTIONS = "transactions"
 EVENTS = "events"
@@ -331,9 +332,7 @@ def get_snuba_column_name(name):
     the column is assumed to be a tag. If name is falsy or name is a quoted literal
     (e.g. "'name'"), leave unchanged.
     """
-    no_conversion = set(["project_id", "start", "end"])
-
-    if name in no_conversion:
+    if name in NO_CONVERSION_COLUMNS:
         return name
 
     if not name or QUOTED_LITERAL_RE.match(name):
@@ -1,58 +1,60 @@
 from __future__ import absolute_import
 
-import datetime
 import time
 import logging
+import uuid
 
 import msgpack
 import pytest
+import six
 
 from sentry.event_manager import EventManager
 from sentry.ingest.ingest_consumer import ConsumerType, run_ingest_consumer
 from sentry.models.event import Event
 from sentry.testutils.factories import Factories
 from django.conf import settings
+from django.db.models.signals import post_save
 
 logger = logging.getLogger(__name__)
 
 
-def _get_test_message(project):
+def _get_test_messages(project, num_events):
     """
-    creates a test message to be inserted in a kafka queue
+    creates test messages to be inserted in a kafka queue
+
+    The event is only normalized once, every message gets its own event id.
     """
-    now = datetime.datetime.now()
-    # the event id should be 32 digits
-    event_id = "{}".format(now.strftime("000000000000%Y%m%d%H%M%S%f"))
-    message_text = "some message {}".format(event_id)
     project_id = project.id  # must match the project id set up by the test fixtures
-    event = {
-        "message": message_text,
-        "extra": {"the_id": event_id},
-        "project_id": project_id,
-        "event_id": event_id,
-    }
+    event = {"message": "some message", "project_id": project_id}
 
     em = EventManager(event, project=project)
     em.normalize()
     normalized_event = dict(em.get_data())
-    message = {
-        "ty": (0, ()),
-        "start_time": time.time(),
-        "event_id": event_id,
-        "project_id": 1,
-        "payload": normalized_event,
-    }
-
-    val = msgpack.packb(message)
-    return val, event_id
 
-
-def _shutdown_requested(max_secs, num_events):
+    messages = []
+    for _ in range(num_events):
+        # the event id should be 32 hex characters
+        event_id = uuid.uuid4().hex
+        normalized_event["event_id"] = event_id
+        normalized_event["extra"] = {"the_id": event_id}
+        message = {
+            "ty": (0, ()),
+            "start_time": time.time(),
+            "event_id": event_id,
+            "project_id": 1,
+            "payload": normalized_event,
+        }
+        messages.append((msgpack.packb(message), event_id))
+    return messages
+
+
+def _shutdown_requested(max_secs, num_events, saved_events):
     """
     Requests a shutdown after the specified interval has passed or the specified number
     of events are detected
     :param max_secs: number of seconds after which to request a shutdown
     :param num_events: number of events after which to request a shutdown
+    :param saved_events: single element list holding the number of events saved so far
     :return: True if a shutdown is requested False otherwise
     """
 
@@ -61,7 +63,7 @@ def _shutdown_requested(max_secs, num_events):
         if end_time - start_time > max_secs:
             logger.debug("Shutdown requested because max secs exceeded")
             return True
-        elif Event.objects.count() >= num_events:
+        elif saved_events[0] >= num_events:
             logger.debug("Shutdown requested because num events reached")
             return True
         else:
@@ -85,26 +87,40 @@ def test_ingest_consumer_reads_from_topic_and_calls_celery_task(
     organization = Factories.create_organization()
     project = Factories.create_project(organization=organization)
 
-    event_ids = set()
-    for _ in range(3):
-        message, event_id = _get_test_message(project)
-        event_ids.add(event_id)
+    messages = _get_test_messages(project, num_events=3)
+    event_ids = {event_id for _, event_id in messages}
+    for message, _ in messages:
         producer.produce(topic_event_name, message)
-
-    with task_runner():
-        run_ingest_consumer(
-            commit_batch_size=2,
-            consumer_group=consumer_group,
-            consumer_type=ConsumerType.Events,
-            max_fetch_time_seconds=0.1,
-            initial_offset_reset="earliest",
-            is_shutdown_requested=_shutdown_requested(max_secs=10, num_events=3),
-        )
+    # deliver everything in one go instead of waiting for the producer to linger
+    assert producer.flush(5) == 0
+
+    saved_events = [0]
+
+    def event_saved(created, **kwargs):
+        if created:
+            saved_events[0] += 1
+
+    # count the saved events as they come instead of querying for them on every poll
+    post_save.connect(event_saved, sender=Event)
+    try:
+        with task_runner():
+            run_ingest_consumer(
+                commit_batch_size=2,
+                consumer_group=consumer_group,
+                consumer_type=ConsumerType.Events,
+                max_fetch_time_seconds=0.1,
+                initial_offset_reset="earliest",
+                is_shutdown_requested=_shutdown_requested(
+                    max_secs=10, num_events=3, saved_events=saved_events
+                ),
+            )
+    finally:
+        post_save.disconnect(event_saved, sender=Event)
 
     # check that we got the messages
     assert Event.objects.count() == 3
-    for event_id in event_ids:
-        message = Event.objects.get(event_id=event_id)
-        assert message is not None
+    events = {event.event_id: event for event in Event.objects.filter(event_id__in=event_ids)}
+    assert set(events) == event_ids
+    for event_id, message in six.iteritems(events):
         # check that the data has not been scrambled
         assert message.data["extra"]["the_id"] == event_id
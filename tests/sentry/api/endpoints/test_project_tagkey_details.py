@@ -27,7 +27,8 @@ class ProjectTagKeyDetailsTest(APITestCase):
             },
         )
 
-        response = self.client.get(url)
+        with self.assertNumQueries(12):
+            response = self.client.get(url)
 
         assert response.status_code == 200
         assert response.data["uniqueValues"] == tagkey.values_seen
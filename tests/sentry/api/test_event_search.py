@@ -13,6 +13,7 @@ from sentry.api.event_search import (
     convert_endpoint_params,
     event_search_grammar,
     get_snuba_query_args,
+    parse_search_tree,
     resolve_field_list,
     get_reference_event_conditions,
     parse_search_query,
@@ -562,6 +563,27 @@ class ParseSearchQueryTest(unittest.TestCase):
         # Empty quotations become a dropped term
         assert parse_search_query("") == []
 
+    def test_free_text(self):
+        # Boolean operators in plain text are part of the message search
+        assert parse_search_query("  hello AND\tworld ") == [
+            SearchFilter(
+                key=SearchKey(name="message"),
+                operator="=",
+                value=SearchValue(raw_value="hello AND\tworld"),
+            )
+        ]
+        with self.assertRaises(InvalidSearchQuery):
+            parse_search_query("   ")
+
+    def test_cached_tree(self):
+        query = "user.email:foo@example.com release:1.2.1 hello"
+        assert parse_search_tree(query) is parse_search_tree(query)
+        assert parse_search_query(query) == parse_search_query(query)
+
+        long_query = " ".join("tag%d:value" % i for i in range(50))
+        assert parse_search_tree(long_query) is not parse_search_tree(long_query)
+        assert parse_search_query(long_query) == parse_search_query(long_query)
+
 
 class ParseBooleanSearchQueryTest(unittest.TestCase):
     def setUp(self):
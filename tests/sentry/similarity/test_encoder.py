@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 import pytest
 import six
+from collections import OrderedDict
 
 from sentry.similarity.encoder import Encoder
 
@@ -42,3 +43,10 @@ def test_custom_types():
     encoder = Encoder({Widget: lambda i: {"color": i.color}})
 
     assert encoder.dumps(Widget("red")) == encoder.dumps({"color": "red"})
+
+
+def test_builtin_subclasses():
+    encoder = Encoder()
+
+    assert encoder.dumps(OrderedDict([("b", 2), ("a", 1)])) == encoder.dumps({"a": 1, "b": 2})
+    assert encoder.dumps(True) == encoder.dumps(u"True")
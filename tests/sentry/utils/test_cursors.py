@@ -1,24 +1,17 @@
 from __future__ import absolute_import
 
 import math
-
-from mock import Mock
+from collections import namedtuple
 
 from sentry.utils.cursors import build_cursor, Cursor
 
-
-def build_mock(**attrs):
-    obj = Mock()
-    for key, value in attrs.items():
-        setattr(obj, key, value)
-    obj.__repr__ = lambda x: repr(attrs)
-    return obj
+Event = namedtuple("Event", ["id", "message"])
 
 
 def test_build_cursor():
-    event1 = build_mock(id=1.1, message="one")
-    event2 = build_mock(id=1.1, message="two")
-    event3 = build_mock(id=2.1, message="three")
+    event1 = Event(id=1.1, message="one")
+    event2 = Event(id=1.1, message="two")
+    event3 = Event(id=2.1, message="three")
 
     results = [event1, event2, event3]
 